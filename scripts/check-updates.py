@@ -4,13 +4,35 @@ import yaml
 import requests
 import re
 from datetime import datetime
-import glob
+import functools
 from typing import Dict, List, Optional, Tuple
+import threading
 import time
 import base64
 import json
 import html
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from packaging import version
+from packaging.version import InvalidVersion, Version
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Prefer the LibYAML C implementation when available (~5-10x faster)
+try:
+    from yaml import CSafeDumper as YamlDumper, CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeDumper as YamlDumper, SafeLoader as YamlLoader
+
+# Prefer orjson for decoding API responses (2-5x faster than stdlib json)
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+except ImportError:
+    def _json_loads(data):
+        return json.loads(data)
 
 # Enhanced repository mappings for GitHub releases
 REPO_MAPPINGS = {
@@ -75,8 +97,8 @@ REPO_MAPPINGS = {
     'portainer/portainer-ce': 'portainer/portainer',
 }
 
-# Enhanced version patterns
-VERSION_PATTERNS = {
+# Enhanced version patterns (compiled once at import below)
+_VERSION_PATTERN_STRINGS = {
     # Automation
     'github-runner': r'^v\d+\.\d+\.\d+$',
     'jenkins': r'^\d+\.\d+(\.\d+)?(-lts)?$',
@@ -135,62 +157,259 @@ VERSION_PATTERNS = {
     'portainer-ce': r'^\d+\.\d+\.\d+$',
 }
 
+VERSION_PATTERNS = {key: re.compile(pattern) for key, pattern in _VERSION_PATTERN_STRINGS.items()}
+
+# Generic fallback patterns for images without a specific entry
+_SEMVER_RE = re.compile(r'^\d+\.\d+(\.\d+)?$')
+_VSEMVER_RE = re.compile(r'^v\d+\.\d+(\.\d+)?$')
+
+# Fused "specific pattern OR generic semver" alternations for loops that
+# accept any of the three (one regex dispatch per tag instead of three)
+_GENERIC_UNION_RE = re.compile(r'^v?\d+\.\d+(\.\d+)?$')
+_UNION_PATTERNS = {
+    key: re.compile(f'(?:{pattern})|(?:^v?\\d+\\.\\d+(\\.\\d+)?$)')
+    for key, pattern in _VERSION_PATTERN_STRINGS.items()
+}
+
+# Thread pool size for parallel registry probes (network-bound I/O)
+MAX_WORKERS = 16
+
+# Shared session: keeps TLS connections alive across the run and retries
+# transient failures with backoff instead of giving up on the first 429/5xx
+SESSION = requests.Session()
+SESSION.headers['User-Agent'] = 'Docker-Update-Checker/1.0'
+_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 502, 503, 504],
+        allowed_methods=['GET'],
+    ),
+)
+SESSION.mount('https://', _adapter)
+SESSION.mount('http://', _adapter)
+
+@functools.lru_cache(maxsize=4096)
+def _parse_version(ver: str) -> Optional[Version]:
+    """Parse a raw tag into a Version, caching results (None = unparseable)
+
+    The same tag strings are parsed repeatedly across compare_versions
+    calls and sort keys, and failures are cached too so they aren't
+    retried."""
+    try:
+        return version.parse(clean_version(ver))
+    except InvalidVersion:
+        return None
+
 def compare_versions(current: str, latest: str) -> bool:
     """Compare two version strings and return True if latest > current"""
+    current_v = _parse_version(current)
+    latest_v = _parse_version(latest)
+    if current_v is None or latest_v is None:
+        print(f"Version comparison error: {current} vs {latest}")
+        return False
+    return latest_v > current_v
+
+def _is_single_step(old: str, new: str) -> bool:
+    """True when new is at most one minor version ahead of old (same major)"""
     try:
-        current_clean = clean_version(current)
-        latest_clean = clean_version(latest)
-        return version.parse(latest_clean) > version.parse(current_clean)
-    except Exception as e:
-        print(f"Version comparison error: {current} vs {latest}: {e}")
+        old_v = Version(clean_version(old))
+        new_v = Version(clean_version(new))
+    except InvalidVersion:
         return False
+    return new_v.major == old_v.major and (new_v.minor - old_v.minor) <= 1
+
+_CLEAN_PREFIX_RE = re.compile(r'^(release-|v)')
+_CLEAN_SUFFIX_RE = re.compile(r'(-alpine|-slim|-lts)$')
 
 def clean_version(ver: str) -> str:
     """Clean version string for comparison"""
-    import re
-    ver = re.sub(r'^(release-|v)', '', ver)
-    ver = re.sub(r'(-alpine|-slim|-lts)$', '', ver)
-    return ver
+    return _CLEAN_SUFFIX_RE.sub('', _CLEAN_PREFIX_RE.sub('', ver))
 
 class RateLimitManager:
-    """Manages rate limiting across different registries"""
+    """Token-bucket rate limiter shared across worker threads
+
+    A fixed gap between consecutive calls serializes the thread pool; a
+    bucket lets bursts up to its capacity proceed immediately while the
+    sustained rate converges on each registry's quota. Retry-After on 429
+    responses is honored by the session's Retry adapter."""
+
+    # Per-registry (burst capacity, refill rate in tokens/second)
+    BUCKETS = {
+        'dockerhub': (20, 180 / 60.0),     # ~180 pulls/min anonymous quota
+        'ghcr': (10, 30 / 60.0),
+        'github_api': (30, 5000 / 3600.0),  # authenticated REST quota
+        'default': (5, 2.0),
+    }
+
     def __init__(self):
-        self.last_request = {}
-        self.delays = {
-            'dockerhub': 2.0,     # 2 seconds between Docker Hub requests
-            'ghcr': 3.0,          # 3 seconds between GHCR requests
-            'github_api': 1.0,    # 1 second between GitHub API requests
-            'default': 0.5        # 0.5 seconds for other registries
-        }
-    
-    def wait_if_needed(self, registry_type: str):
-        """Wait if needed to respect rate limits"""
         now = time.time()
-        last = self.last_request.get(registry_type, 0)
-        delay = self.delays.get(registry_type, self.delays['default'])
-        
-        if now - last < delay:
-            time.sleep(delay - (now - last))
-        
-        self.last_request[registry_type] = time.time()
+        self.condition = threading.Condition()
+        self.tokens = {key: float(capacity) for key, (capacity, _) in self.BUCKETS.items()}
+        self.updated = {key: now for key in self.BUCKETS}
+
+    def wait_if_needed(self, registry_type: str):
+        """Block until a token is available for this registry"""
+        if registry_type not in self.BUCKETS:
+            registry_type = 'default'
+        capacity, rate = self.BUCKETS[registry_type]
+
+        with self.condition:
+            while True:
+                now = time.time()
+                elapsed = now - self.updated[registry_type]
+                tokens = min(capacity, self.tokens[registry_type] + elapsed * rate)
+                self.updated[registry_type] = now
+
+                if tokens >= 1.0:
+                    self.tokens[registry_type] = tokens - 1.0
+                    return
+
+                self.tokens[registry_type] = tokens
+                # Sleep until roughly a full token has refilled; waiting on
+                # the condition lets other registries' callers proceed
+                self.condition.wait(timeout=(1.0 - tokens) / rate)
+
+# On-disk ETag cache so repeat runs can use conditional requests; GitHub's
+# 304 responses have empty bodies and don't consume rate-limit quota
+ETAG_CACHE_PATH = os.path.expanduser('~/.cache/unraid-check-updates/etags.json')
+
+_etag_cache: Optional[Dict] = None
+_etag_lock = threading.Lock()
+_rate_limit_logged = False
+
+def _load_etag_cache() -> Dict:
+    """Load the URL -> {etag, body, last_modified} cache from disk (once)"""
+    global _etag_cache
+    with _etag_lock:
+        if _etag_cache is None:
+            try:
+                with open(ETAG_CACHE_PATH, 'r') as f:
+                    _etag_cache = json.load(f)
+            except Exception:
+                _etag_cache = {}
+        return _etag_cache
+
+def _save_etag_cache() -> None:
+    """Persist the ETag cache for the next run"""
+    with _etag_lock:
+        if _etag_cache is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(ETAG_CACHE_PATH), exist_ok=True)
+            with open(ETAG_CACHE_PATH, 'w') as f:
+                json.dump(_etag_cache, f)
+        except Exception as e:
+            print(f"Warning: could not save ETag cache: {e}")
 
+def conditional_get(url: str, headers: Dict[str, str], params: Optional[Dict] = None, timeout: int = 20) -> Tuple[int, Optional[object]]:
+    """GET with If-None-Match, returning (status_code, parsed_json)
+
+    On 304 Not Modified the cached body is reused, so unchanged endpoints
+    cost zero transfer (and zero GitHub rate-limit quota)."""
+    cache = _load_etag_cache()
+    cache_key = url if not params else url + '?' + '&'.join(f"{k}={v}" for k, v in sorted(params.items()))
+
+    headers = dict(headers)
+    with _etag_lock:
+        entry = cache.get(cache_key)
+    if entry:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        # Some endpoints only honor Last-Modified, so send both validators
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    response = SESSION.get(url, headers=headers, params=params, timeout=timeout)
+
+    # Log remaining GitHub quota once per run so rate-limit exhaustion is
+    # visible in CI logs instead of showing up as silent None returns
+    global _rate_limit_logged
+    if not _rate_limit_logged and 'api.github.com' in url:
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        if remaining is not None:
+            print(f"GitHub API rate limit remaining: {remaining}")
+            _rate_limit_logged = True
+
+    if response.status_code == 304 and entry:
+        try:
+            return 200, _json_loads(entry['body'])
+        except Exception:
+            pass
+
+    if response.status_code == 200:
+        etag = response.headers.get('ETag')
+        if etag:
+            with _etag_lock:
+                cache[cache_key] = {
+                    'etag': etag,
+                    'body': response.text,
+                    'last_modified': response.headers.get('Last-Modified'),
+                }
+        try:
+            return 200, _json_loads(response.content)
+        except Exception:
+            return 200, None
+
+    return response.status_code, None
+
+# Per-service probe cache: remembers the last successful registry check so
+# unchanged services can skip the HTTP round-trip entirely for 24 hours
+PROBE_CACHE_PATH = '.cache/check-updates-probes.json'
+PROBE_CACHE_TTL = 86400  # seconds
+
+def _load_probe_cache() -> Dict:
+    """Load the probe cache from the working directory
+
+    Shape: {'probes': {file::service -> probe entry},
+            'files': {file -> {mtime, services}}}. The files section lets
+    an unchanged compose file skip the YAML parse entirely."""
+    try:
+        with open(PROBE_CACHE_PATH, 'r') as f:
+            cache = json.load(f)
+        if isinstance(cache, dict) and 'probes' in cache and 'files' in cache:
+            return cache
+    except Exception:
+        pass
+    return {'probes': {}, 'files': {}}
+
+def _save_probe_cache(cache: Dict) -> None:
+    """Persist the per-service probe cache for the next run"""
+    try:
+        os.makedirs(os.path.dirname(PROBE_CACHE_PATH), exist_ok=True)
+        with open(PROBE_CACHE_PATH, 'w') as f:
+            json.dump(cache, f)
+    except Exception as e:
+        print(f"Warning: could not save probe cache: {e}")
+
+@functools.cache
 def get_auth_headers() -> Dict[str, str]:
-    """Get authentication headers for various registries"""
-    headers = {
-        'User-Agent': 'Docker-Update-Checker/1.0'
-    }
-    
-    # GitHub token for GHCR and GitHub API
+    """Get authentication headers for various registries
+
+    The User-Agent lives on SESSION.headers, so these dicts carry only the
+    per-registry auth. Env vars are fixed for the process lifetime, so the
+    result is computed once; callers must not mutate it."""
+    headers = {}
+
+
+    # GitHub token for GHCR and GitHub API - authenticated requests get
+    # 5000/hr instead of the 60/hr unauthenticated cap
     github_token = os.environ.get('GITHUB_TOKEN') or os.environ.get('GITHUB_ACCESS_TOKEN')
     if github_token:
-        headers['Authorization'] = f'token {github_token}'
-    
+        headers['Authorization'] = f'Bearer {github_token}'
+
     return headers
 
+@functools.cache
 def get_docker_hub_auth_headers() -> Dict[str, str]:
-    """Get Docker Hub authentication headers if credentials available"""
-    headers = {'User-Agent': 'Docker-Update-Checker/1.0'}
-    
+    """Get Docker Hub authentication headers if credentials available
+
+    Cached for the process lifetime; callers must not mutate the result."""
+    headers = {}
+
+
     username = os.environ.get('DOCKER_HUB_USERNAME')
     password = os.environ.get('DOCKER_HUB_PASSWORD')
     
@@ -202,29 +421,63 @@ def get_docker_hub_auth_headers() -> Dict[str, str]:
     
     return headers
 
+# Registry prefixes stripped when deriving an image's pattern key; at most
+# one can match, so removeprefix + break beats chained .replace scans
+_REGISTRY_PREFIXES = ('ghcr.io/', 'lscr.io/', 'docker.io/', 'quay.io/')
+
+@functools.lru_cache(maxsize=256)
 def get_image_key(image_name: str) -> str:
     """Extract key from image name for pattern matching"""
-    clean_name = image_name.replace('ghcr.io/', '').replace('lscr.io/', '')
-    clean_name = clean_name.replace('docker.io/', '').replace('quay.io/', '')
-    
+    clean_name = image_name
+    for prefix in _REGISTRY_PREFIXES:
+        if clean_name.startswith(prefix):
+            clean_name = clean_name[len(prefix):]
+            break
+
     if '/' in clean_name:
         parts = clean_name.split('/')
         return parts[-1].split(':')[0]
     return clean_name.split(':')[0]
 
+# Cache of image reference -> compiled version pattern so the hot tag loops
+# do a single dict lookup per image instead of key-extraction + pattern get
+_PATTERN_BY_IMAGE: Dict[str, Optional[re.Pattern]] = {}
+
+def _pattern_for_image(image_name: str) -> Optional[re.Pattern]:
+    """Resolve (and cache) the compiled version pattern for an image reference"""
+    try:
+        return _PATTERN_BY_IMAGE[image_name]
+    except KeyError:
+        pattern = VERSION_PATTERNS.get(get_image_key(image_name))
+        _PATTERN_BY_IMAGE[image_name] = pattern
+        return pattern
+
+# Sanitization patterns, compiled once instead of per call. The dangerous-char
+# removal and newline/tab replacement are fused into one translate table; the
+# whitespace collapse and non-printable strip stay as regexes (the latter must
+# also catch arbitrary non-ASCII codepoints a finite table can't enumerate)
+_SANITIZE_TABLE = {ord(c): None for c in '<>"`$\\'}
+_SANITIZE_TABLE.update({ord('\r'): ' ', ord('\n'): ' ', ord('\t'): ' '})
+_MULTI_WS_RE = re.compile(r'\s+')
+_NON_PRINTABLE_RE = re.compile(r'[^\x20-\x7E]')
+
 def sanitize_for_github_env(content: str) -> str:
     """Sanitize content for GitHub Actions environment variables - much more aggressive"""
     if not content:
         return ""
-    
+
     # Convert to string and handle encoding issues
     content = str(content)
-    
+
+    # Output is truncated to ~200 chars anyway, so don't scan the tail of
+    # multi-KB release bodies
+    if len(content) > 2000:
+        content = content[:2000]
+
     # Remove/replace problematic characters for GitHub Actions
-    content = re.sub(r'[<>"`$\\]', '', content)  # Remove dangerous chars
-    content = re.sub(r'[\r\n\t]', ' ', content)  # Replace newlines/tabs with spaces
-    content = re.sub(r'\s+', ' ', content)       # Normalize whitespace
-    content = re.sub(r'[^\x20-\x7E]', '', content)  # Remove non-printable chars
+    content = content.translate(_SANITIZE_TABLE)  # Dangerous chars + newlines/tabs, one pass
+    content = _MULTI_WS_RE.sub(' ', content)      # Normalize whitespace
+    content = _NON_PRINTABLE_RE.sub('', content)  # Remove non-printable chars
     
     # Limit length to prevent issues
     max_length = 200
@@ -245,41 +498,40 @@ def get_ghcr_latest_tag(registry_path: str, rate_limiter: RateLimitManager) -> O
         owner = parts[0]
         package = parts[1]
         
-        # Use GitHub Packages API
+        # Use GitHub Packages API; the default page of 30 versions is often
+        # all arch/nightly tags for busy packages, so ask for 100 to make
+        # sure a tagged release is actually in the page
         url = f"https://api.github.com/users/{owner}/packages/container/{package}/versions"
         headers = get_auth_headers()
-        
-        response = requests.get(url, headers=headers, timeout=20)
+        params = {'per_page': 100}
 
-        if response.status_code == 404:
+        status, versions = conditional_get(url, headers, params=params)
+
+        if status == 404:
             url_org = f"https://api.github.com/orgs/{owner}/packages/container/{package}/versions"
-            response = requests.get(url_org, headers=headers, timeout=20)
+            status, versions = conditional_get(url_org, headers, params=params)
 
-        if response.status_code == 429:
+        if status == 429:
             print(f"Rate limited for GHCR {registry_path}, waiting...")
             time.sleep(60)
             return None
-        
-        if response.status_code != 200:
-            print(f"GHCR API error for {registry_path}: {response.status_code}")
+
+        if status != 200:
+            print(f"GHCR API error for {registry_path}: {status}")
             return None
-        
-        versions = response.json()
+
         if not versions:
             return None
         
-        # Find the latest version with a semantic version tag
-        image_key = get_image_key(registry_path)
-        pattern = VERSION_PATTERNS.get(image_key)
-        
+        # Find the latest version with a semantic version tag. This loop
+        # accepts either the image-specific pattern or generic semver, so
+        # the fused union regex gives one match call per tag
+        union_match = _UNION_PATTERNS.get(get_image_key(registry_path), _GENERIC_UNION_RE).match
+
         for version in versions:
             tags = version.get('metadata', {}).get('container', {}).get('tags', [])
             for tag in tags:
-                if pattern and re.match(pattern, tag):
-                    return tag
-                elif re.match(r'^\d+\.\d+(\.\d+)?$', tag):
-                    return tag
-                elif re.match(r'^v\d+\.\d+(\.\d+)?$', tag):
+                if union_match(tag):
                     return tag
         
         return None
@@ -288,16 +540,37 @@ def get_ghcr_latest_tag(registry_path: str, rate_limiter: RateLimitManager) -> O
         print(f"Error checking GHCR {registry_path}: {e}")
         return None
 
+# Process-lifetime cache of image -> latest tag. The executor already shares
+# in-flight probes, but this also covers any sequential re-checks (cache-miss
+# retries, future callers) without another round-trip
+_TAG_CACHE: Dict[str, Optional[str]] = {}
+_tag_cache_lock = threading.Lock()
+
 def get_latest_docker_tag(image_name: str, rate_limiter: RateLimitManager) -> Optional[str]:
     """Get the latest tag for a Docker image with enhanced authentication"""
+    with _tag_cache_lock:
+        if image_name in _TAG_CACHE:
+            return _TAG_CACHE[image_name]
+
+    latest_tag = _fetch_latest_docker_tag(image_name, rate_limiter)
+
+    # Only cache successful lookups so transient failures get retried
+    if latest_tag is not None:
+        with _tag_cache_lock:
+            _TAG_CACHE[image_name] = latest_tag
+
+    return latest_tag
+
+def _fetch_latest_docker_tag(image_name: str, rate_limiter: RateLimitManager) -> Optional[str]:
+    """Resolve the latest tag from the appropriate registry (uncached)"""
     try:
         # Handle different registry formats
         if image_name.startswith('ghcr.io/'):
-            registry_path = image_name.replace('ghcr.io/', '')
+            registry_path = image_name.removeprefix('ghcr.io/')
             return get_ghcr_latest_tag(registry_path, rate_limiter)
         elif image_name.startswith('lscr.io/'):
             # LinuxServer.io images - try fallback to GitHub releases
-            registry_path = image_name.replace('lscr.io/', '')
+            registry_path = image_name.removeprefix('lscr.io/')
             return get_dockerhub_latest_tag(registry_path, rate_limiter)
         elif '/' not in image_name:
             registry_path = f"library/{image_name}"
@@ -309,225 +582,471 @@ def get_latest_docker_tag(image_name: str, rate_limiter: RateLimitManager) -> Op
         print(f"Error checking {image_name}: {e}")
         return None
 
+def _pick_latest_tag(tag_names: List[str], image_name: str) -> Optional[str]:
+    """Pick the highest version from a list of tag names"""
+    pattern = _pattern_for_image(image_name)
+
+    # Collect ALL valid version tags; bind the match methods once so the
+    # comprehension does a direct C call per tag
+    valid_tags = []
+
+    # Try pattern matching first
+    if pattern:
+        match = pattern.match
+        valid_tags = [t for t in tag_names if match(t)]
+
+    # Fallback to generic semantic versioning
+    if not valid_tags:
+        semver_match, vsemver_match = _SEMVER_RE.match, _VSEMVER_RE.match
+        valid_tags = [t for t in tag_names if semver_match(t) or vsemver_match(t)]
+
+    if not valid_tags:
+        return None
+
+    # Find the HIGHEST version, not just the first one; only the max is
+    # needed, so an O(n) scan beats a full sort
+    parseable = [t for t in valid_tags if _parse_version(t) is not None]
+    if parseable:
+        return max(parseable, key=_parse_version)
+
+    print(f"Error sorting versions for {image_name}: no parseable tags")
+    return valid_tags[0]
+
+def _get_registry_latest_tag(registry_path: str, rate_limiter: RateLimitManager) -> Optional[str]:
+    """Get latest tag via the registry-native tags/list endpoint
+
+    Unlike the Hub 'repositories' API this returns a bare
+    {"name": ..., "tags": [...]} document - no pagination metadata and no
+    server-side sort - after a free anonymous pull token."""
+    try:
+        rate_limiter.wait_if_needed('dockerhub')
+
+        token_params = {
+            'service': 'registry.docker.io',
+            'scope': f'repository:{registry_path}:pull',
+        }
+        response = SESSION.get('https://auth.docker.io/token', params=token_params, timeout=20)
+        if response.status_code != 200:
+            return None
+        token = _json_loads(response.content).get('token')
+        if not token:
+            return None
+
+        headers = {'Authorization': f'Bearer {token}'}
+        status, data = conditional_get(f"https://registry-1.docker.io/v2/{registry_path}/tags/list", headers)
+        if status != 200 or not data:
+            return None
+
+        # Order isn't guaranteed by the spec, so sort client-side
+        return _pick_latest_tag(data.get('tags') or [], registry_path)
+
+    except Exception as e:
+        print(f"Error checking registry tags/list for {registry_path}: {e}")
+        return None
+
 def get_dockerhub_latest_tag(registry_path: str, rate_limiter: RateLimitManager) -> Optional[str]:
     """Get latest tag with proper semantic version comparison"""
+    # Prefer the lightweight registry-native endpoint; fall back to the
+    # Hub API when the token dance or tags/list call fails
+    latest = _get_registry_latest_tag(registry_path, rate_limiter)
+    if latest:
+        return latest
+
     try:
         rate_limiter.wait_if_needed('dockerhub')
-        
+
         url = f"https://registry.hub.docker.com/v2/repositories/{registry_path}/tags"
-        params = {"page_size": 100}  # Increased from 50, removed ordering
+        # Docker Hub returns tags newest-first, so with the precompiled
+        # patterns a match is nearly always in the first page; 25 tags keeps
+        # the payload (and ETag cache entry) a quarter of the size
+        params = {"page_size": 25}
         headers = get_docker_hub_auth_headers()
-        
-        response = requests.get(url, params=params, headers=headers, timeout=20)
-        
-        if response.status_code == 429:
+
+        status, data = conditional_get(url, headers, params=params)
+
+        if status == 429:
             print(f"Docker Hub rate limited for {registry_path}")
             time.sleep(30)
             return None
-        
-        if response.status_code != 200:
-            print(f"Docker Hub API error for {registry_path}: {response.status_code}")
+
+        if status != 200 or data is None:
+            print(f"Docker Hub API error for {registry_path}: {status}")
             return None
-        
-        data = response.json()
+
         tags = data.get("results", [])
-        
+
         if not tags:
             return None
-        
-        image_key = get_image_key(registry_path)
-        pattern = VERSION_PATTERNS.get(image_key)
-        
-        # Collect ALL valid version tags
-        valid_tags = []
-        
-        # Try pattern matching first
-        if pattern:
-            for tag in tags:
-                tag_name = tag["name"]
-                if re.match(pattern, tag_name):
-                    valid_tags.append(tag_name)
-        
-        # Fallback to generic semantic versioning
-        if not valid_tags:
-            for tag in tags:
-                tag_name = tag["name"]
-                if re.match(r'^\d+\.\d+(\.\d+)?$', tag_name):
-                    valid_tags.append(tag_name)
-                elif re.match(r'^v\d+\.\d+(\.\d+)?$', tag_name):
-                    valid_tags.append(tag_name)
-        
-        if not valid_tags:
-            return None
-        
-        # Find the HIGHEST version, not just the first one
-        try:
-            # Sort by semantic version (highest first)
-            sorted_tags = sorted(valid_tags, key=lambda x: version.parse(clean_version(x)), reverse=True)
-            return sorted_tags[0]
-        except Exception as e:
-            print(f"Error sorting versions for {registry_path}: {e}")
-            return valid_tags[0]
-        
+
+        return _pick_latest_tag([tag["name"] for tag in tags], registry_path)
+
     except Exception as e:
         print(f"Error checking Docker Hub {registry_path}: {e}")
         return None
 
+def _release_to_change(release: Dict) -> Optional[Dict]:
+    """Convert a GitHub release object into a sanitized changelog entry"""
+    # Sanitize all text content for GitHub Actions safety
+    version = sanitize_for_github_env(release.get('tag_name', ''))
+    name = sanitize_for_github_env(release.get('name', ''))
+    body = sanitize_for_github_env(release.get('body', ''))
+    url = release.get('html_url', '')  # URLs are generally safe
+    published = release.get('published_at', '')[:10]  # Just the date part
+
+    # Only return if we have meaningful content
+    if version and name:
+        return {
+            'version': version,
+            'name': name,
+            'body': body,
+            'url': url,
+            'published': published
+        }
+    return None
+
 def get_github_releases(repo_name: str, old_version: str, new_version: str, rate_limiter: RateLimitManager) -> Optional[List[Dict]]:
     """Get GitHub releases between two versions with enhanced error handling"""
     try:
         rate_limiter.wait_if_needed('github_api')
-        
-        url = f"https://api.github.com/repos/{repo_name}/releases"
+
         headers = get_auth_headers()
-        response = requests.get(url, headers=headers, timeout=20)
-        
-        if response.status_code == 429:
+
+        # Fast path: for the common single-step bump only the new release
+        # matters, and the per-tag endpoint returns one small object instead
+        # of the full 30-release listing
+        if _is_single_step(old_version, new_version):
+            tag_url = f"https://api.github.com/repos/{repo_name}/releases/tags/{new_version}"
+            status, release = conditional_get(tag_url, headers)
+            if status == 200 and release:
+                change = _release_to_change(release)
+                if change:
+                    return [change]
+
+        url = f"https://api.github.com/repos/{repo_name}/releases"
+        # Only the first few releases can be in range, so a 10-entry page
+        # is plenty and roughly a third of the default payload
+        status, releases = conditional_get(url, headers, params={'per_page': 10})
+
+        if status == 429:
             print(f"GitHub API rate limited for {repo_name}")
             time.sleep(60)
             return None
-        
-        if response.status_code != 200:
+
+        if status != 200 or releases is None:
             return None
-        
-        releases = response.json()
-        changes = []
-        
-        old_clean = old_version.replace('release-', '').replace('v', '').replace('-alpine', '')
-        new_clean = new_version.replace('release-', '').replace('v', '').replace('-alpine', '')
-        
-        for release in releases:
-            try:
-                tag = release.get('tag_name', '').replace('release-', '').replace('v', '').replace('-alpine', '')
-                
-                if tag == new_clean or (old_clean < tag <= new_clean):
-                    # Sanitize all text content for GitHub Actions safety
-                    version = sanitize_for_github_env(release.get('tag_name', ''))
-                    name = sanitize_for_github_env(release.get('name', ''))
-                    body = sanitize_for_github_env(release.get('body', ''))
-                    url = release.get('html_url', '')  # URLs are generally safe
-                    published = release.get('published_at', '')[:10]  # Just the date part
-                    
-                    # Only add if we have meaningful content
-                    if version and name:
-                        changes.append({
-                            'version': version,
-                            'name': name,
-                            'body': body,
-                            'url': url,
-                            'published': published
-                        })
-            except Exception as e:
-                # Skip individual releases that cause issues
-                print(f"Warning: Skipping release due to parsing error: {e}")
-                continue
-        
-        return changes[:3]  # Limit to 3 most recent
-        
+
+        return _filter_release_range(releases, old_version, new_version)
+
     except Exception as e:
         print(f"Error getting releases for {repo_name}: {e}")
     return None
 
-def check_service_for_updates(compose_file_path: str, rate_limiter: RateLimitManager) -> Tuple[List[Dict], bool]:
-    """Check a specific docker-compose file for updates with rate limiting"""
-    updates = []
+def _filter_release_range(releases: List[Dict], old_version: str, new_version: str) -> List[Dict]:
+    """Filter a newest-first release list down to the (old, new] range"""
+    changes = []
+
+    # Parse once outside the loop via the shared cache; Version handles both
+    # semver and the calendar schemes (home-assistant YYYY.M, authentik
+    # YYYY.M.P)
+    old_v = _parse_version(old_version)
+    new_v = _parse_version(new_version)
+
+    for release in releases:
+        try:
+            tag = release.get('tag_name', '')
+
+            if old_v is not None and new_v is not None:
+                tag_v = _parse_version(tag)
+                if tag_v is None:
+                    continue
+                # Releases come back newest-first, so everything from
+                # the old version down is out of range - stop scanning
+                if tag_v <= old_v:
+                    break
+                in_range = tag_v <= new_v
+            else:
+                # Unparseable bounds: fall back to exact-match only
+                in_range = clean_version(tag) == clean_version(new_version)
+
+            if in_range:
+                change = _release_to_change(release)
+                if change:
+                    changes.append(change)
+        except Exception as e:
+            # Skip individual releases that cause issues
+            print(f"Warning: Skipping release due to parsing error: {e}")
+            continue
+
+    return changes[:3]  # Limit to 3 most recent
+
+def _find_compose_files(base: str = 'services') -> List[str]:
+    """Find compose files with a two-level scandir walk
+
+    The tree is always services/<category>/<service>/docker-compose.yml, so
+    an explicit walk stats one entry per directory instead of the full
+    recursive fnmatch traversal glob does."""
+    compose_files = []
+    try:
+        with os.scandir(base) as categories:
+            for category in categories:
+                if not category.is_dir():
+                    continue
+                with os.scandir(category.path) as services:
+                    for service in services:
+                        if not service.is_dir():
+                            continue
+                        path = os.path.join(service.path, 'docker-compose.yml')
+                        if os.path.isfile(path):
+                            compose_files.append(path)
+    except OSError as e:
+        print(f"Error scanning {base}: {e}")
+    return compose_files
+
+# Raw-bytes scan for image: lines, used to skip the YAML parse entirely for
+# files that can't produce any work
+_IMAGE_LINE_RX = re.compile(rb'^\s*image:\s*["\']?([^\s"\']+)', re.MULTILINE)
+
+def _has_pinned_tag(image_ref: bytes) -> bool:
+    """True when an image reference carries an explicit non-latest tag"""
+    if image_ref.endswith(b':latest'):
+        return False
+    # Look for a tag on the final path segment so registry ports don't count
+    return b':' in image_ref.rsplit(b'/', 1)[-1]
+
+def collect_service_images(compose_file_path: str) -> Tuple[Optional[Dict], List[Dict]]:
+    """Parse a compose file and collect its checkable images (no network calls)"""
+    work_items = []
 
     if "github-runner" in compose_file_path or "automation/github-runner" in compose_file_path:
         print(f"🚫 SKIPPING: {compose_file_path} (GitHub runner - never update during CI/CD)")
-        return updates, False
-    
+        return None, work_items
+
     try:
-        with open(compose_file_path, 'r') as f:
-            compose_data = yaml.safe_load(f)
+        with open(compose_file_path, 'rb') as f:
+            raw = f.read()
     except Exception as e:
         print(f"Error reading {compose_file_path}: {e}")
-        return updates, False
-    
+        return None, work_items
+
+    # Cheap pre-scan: when every image is ':latest' or untagged there's
+    # nothing to check, so don't pay for the YAML parse
+    if not any(_has_pinned_tag(ref) for ref in _IMAGE_LINE_RX.findall(raw)):
+        print(f"Skipping {compose_file_path}: no pinned image tags")
+        return None, work_items
+
+    try:
+        compose_data = yaml.load(raw, Loader=YamlLoader)
+    except Exception as e:
+        print(f"Error reading {compose_file_path}: {e}")
+        return None, work_items
+
     if 'services' not in compose_data:
-        return updates, False
-    
-    modified = False
-    
+        return None, work_items
+
     for service_name, service_config in compose_data['services'].items():
         if 'image' not in service_config:
             continue
-            
+
         current_image = service_config['image']
-        
+
         # Skip latest tags
         if current_image.endswith(':latest'):
             print(f"Skipping {service_name}: uses ':latest' tag")
             continue
-        
+
         # Parse image name and tag
         if ':' in current_image:
             image_name, current_tag = current_image.rsplit(':', 1)
         else:
             print(f"Skipping {service_name}: no tag specified")
             continue
-        
-        print(f"Checking {service_name} ({current_image})...")
-        
-        # Get latest version with rate limiting
-        latest_tag = get_latest_docker_tag(image_name, rate_limiter)
-        
+
+        work_items.append({
+            'service': service_name,
+            'file': compose_file_path,
+            'config': service_config,
+            'image': image_name,
+            'tag': current_tag,
+        })
+
+    return compose_data, work_items
+
+def probe_image(image_name: str, current_tag: str, rate_limiter: RateLimitManager) -> Tuple[Optional[str], Optional[List[Dict]]]:
+    """Thread pool worker: fetch the latest tag for one image
+
+    Changelogs are attached afterwards in one batched GraphQL query (see
+    get_github_releases_batch), so the worker only does the tag lookup."""
+    return get_latest_docker_tag(image_name, rate_limiter), None
+
+def get_github_releases_batch(update_specs: List[Tuple[str, str, str]], rate_limiter: RateLimitManager) -> Dict[str, Optional[List[Dict]]]:
+    """Fetch releases for every repo with a pending update in one GraphQL POST
+
+    update_specs is a list of (repo_name, old_version, new_version). One
+    aliased GraphQL query replaces N REST round-trips and costs a single
+    rate-limit point; repos the query misses fall back to the REST path."""
+    unique = {}
+    for repo_name, old_version, new_version in update_specs:
+        unique.setdefault(repo_name, (old_version, new_version))
+
+    results: Dict[str, Optional[List[Dict]]] = {}
+    if not unique:
+        return results
+
+    github_token = os.environ.get('GITHUB_TOKEN') or os.environ.get('GITHUB_ACCESS_TOKEN')
+    if github_token:
+        try:
+            rate_limiter.wait_if_needed('github_api')
+
+            aliases = {}
+            query_parts = []
+            for i, repo_name in enumerate(unique):
+                owner, _, name = repo_name.partition('/')
+                alias = f"r{i}"
+                aliases[alias] = repo_name
+                query_parts.append(
+                    f'{alias}: repository(owner: "{owner}", name: "{name}") {{ '
+                    'releases(first: 10, orderBy: {field: CREATED_AT, direction: DESC}) '
+                    '{ nodes { tagName name publishedAt url description } } }'
+                )
+            query = 'query { ' + ' '.join(query_parts) + ' }'
+
+            response = SESSION.post(
+                'https://api.github.com/graphql',
+                json={'query': query},
+                headers={'Authorization': f'Bearer {github_token}'},
+                timeout=30,
+            )
+
+            if response.status_code == 200:
+                data = _json_loads(response.content).get('data') or {}
+                for alias, repo_name in aliases.items():
+                    node = data.get(alias)
+                    if not node:
+                        continue
+                    # Reshape GraphQL nodes to the REST field names so the
+                    # existing range filter and sanitization apply as-is
+                    releases = [
+                        {
+                            'tag_name': n.get('tagName', ''),
+                            'name': n.get('name', ''),
+                            'body': n.get('description', ''),
+                            'html_url': n.get('url', ''),
+                            'published_at': n.get('publishedAt', '') or '',
+                        }
+                        for n in node.get('releases', {}).get('nodes', [])
+                    ]
+                    old_version, new_version = unique[repo_name]
+                    results[repo_name] = _filter_release_range(releases, old_version, new_version)
+        except Exception as e:
+            print(f"GraphQL batch release query failed, falling back to REST: {e}")
+
+    # REST fallback for anything the batch didn't cover (no token, repo
+    # renamed/missing, or the whole GraphQL call failed)
+    for repo_name, (old_version, new_version) in unique.items():
+        if repo_name not in results:
+            results[repo_name] = get_github_releases(repo_name, old_version, new_version, rate_limiter)
+
+    return results
+
+def _rewrite_image_lines(compose_file_path: str, replacements: List[Tuple[str, str]]) -> bool:
+    """Swap updated image refs directly in the file text
+
+    Returns True when every replacement hit exactly one image: line; on any
+    mismatch the caller falls back to a full yaml.dump."""
+    try:
+        with open(compose_file_path, 'r') as f:
+            content = f.read()
+
+        for old_image, new_image in replacements:
+            pattern = re.compile(rf'(image:\s*["\']?){re.escape(old_image)}', re.MULTILINE)
+            content, count = pattern.subn(lambda m: m.group(1) + new_image, content, count=1)
+            if count != 1:
+                return False
+
+        # Write to a sibling temp file and os.replace it so a crash mid-write
+        # can't leave a truncated compose file behind
+        tmp_path = compose_file_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, compose_file_path)
+        return True
+    except Exception as e:
+        print(f"Error rewriting image lines in {compose_file_path}: {e}")
+        return False
+
+def apply_updates(compose_file_path: str, compose_data: Optional[Dict], results: List[Tuple[Dict, Optional[str], Optional[List[Dict]]]]) -> Tuple[List[Dict], bool]:
+    """Apply probe results to the compose file, rewriting it at most once
+
+    compose_data may be None when the file's service listing came from the
+    cache without a parse; it's only reloaded if the dump fallback fires."""
+    updates = []
+    modified = False
+
+    replacements = []
+    new_images = {}
+
+    for item, latest_tag, changelog in results:
+        current_tag = item['tag']
+        image_name = item['image']
+
         if latest_tag and compare_versions(current_tag, latest_tag):
-            print(f"  Update available: {current_tag} -> {latest_tag}")
-            
-            # Get changelog if we have repo mapping
-            changelog = None
-            repo_name = REPO_MAPPINGS.get(image_name)
-            if repo_name:
-                changelog = get_github_releases(repo_name, current_tag, latest_tag, rate_limiter)
-            
+            print(f"  Update available: {item['service']}: {current_tag} -> {latest_tag}")
+
             # Update the compose file
-            service_config['image'] = f"{image_name}:{latest_tag}"
+            new_image = f"{image_name}:{latest_tag}"
+            if item['config'] is not None:
+                item['config']['image'] = new_image
+            new_images[item['service']] = new_image
+            replacements.append((f"{image_name}:{current_tag}", new_image))
             modified = True
-            
+
+            path_parts = compose_file_path.split('/')
             updates.append({
-                'service': service_name,
+                'service': item['service'],
                 'file': compose_file_path,
+                'category': path_parts[1] if len(path_parts) > 1 else 'unknown',
                 'old_version': current_tag,
                 'new_version': latest_tag,
                 'image': image_name,
                 'changelog': changelog,
-                'repo': repo_name
+                'repo': REPO_MAPPINGS.get(image_name)
             })
         else:
             if latest_tag:
-                print(f"  Up to date or downgrade rejected: {current_tag} >= {latest_tag}")
+                print(f"  Up to date or downgrade rejected: {item['service']}: {current_tag} >= {latest_tag}")
             else:
-                print(f"  Could not check: {current_tag}")
-    
-    # Save modified file
+                print(f"  Could not check: {item['service']}: {current_tag}")
+
+    # Save modified file: rewrite just the changed image: lines in place so
+    # comments, key order and quoting survive and the PR diff stays minimal
     if modified:
-        try:
-            with open(compose_file_path, 'w') as f:
-                yaml.dump(compose_data, f, default_flow_style=False, sort_keys=False)
-        except Exception as e:
-            print(f"Error writing {compose_file_path}: {e}")
-            return updates, False
-    
+        if not _rewrite_image_lines(compose_file_path, replacements):
+            # Fallback: full re-serialization of the parsed document,
+            # reloading it first if the parse was skipped via the cache
+            try:
+                if compose_data is None:
+                    with open(compose_file_path, 'rb') as f:
+                        compose_data = yaml.load(f, Loader=YamlLoader)
+                    for service_name, new_image in new_images.items():
+                        compose_data['services'][service_name]['image'] = new_image
+                with open(compose_file_path, 'w') as f:
+                    yaml.dump(compose_data, f, Dumper=YamlDumper, default_flow_style=False, sort_keys=False)
+            except Exception as e:
+                print(f"Error writing {compose_file_path}: {e}")
+                return updates, False
+
     return updates, modified
 
-def safe_write_github_env(env_file: str, updates: List[Dict]) -> None:
+def safe_write_github_env(env_file: str, updates: List[Dict], by_category: Dict[str, List[Dict]]) -> None:
     """Write environment variables for GitHub Actions using simple format"""
     try:
         with open(env_file, 'a') as f:
             f.write("UPDATES_FOUND=true\n")
             f.write(f"UPDATE_DATE={datetime.now().strftime('%Y-%m-%d')}\n")
-            
+
             # Create a simple, safe summary
             summary_lines = []
-            
-            # Group by category
-            by_category = {}
-            for update in updates:
-                category = update['file'].split('/')[1]
-                if category not in by_category:
-                    by_category[category] = []
-                by_category[category].append(update)
-            
+
             # Build summary
             summary_lines.append(f"Found {len(updates)} container updates across {len(by_category)} categories")
             summary_lines.append("")
@@ -541,8 +1060,10 @@ def safe_write_github_env(env_file: str, updates: List[Dict]) -> None:
                     summary_lines.append(f"  - {service_name}: {old_version} -> {new_version}")
                 summary_lines.append("")
             
-            # Write as a simple string (no heredoc)
-            summary_content = " | ".join(summary_lines).replace('\n', ' ')
+            # Write as a simple string (no heredoc); the lines are built in a
+            # list and joined once, so there's no quadratic concatenation and
+            # nothing left to strip
+            summary_content = " | ".join(summary_lines)
             f.write(f"UPDATE_SUMMARY={summary_content}\n")
             
     except Exception as e:
@@ -587,45 +1108,171 @@ def main():
     
     if os.path.exists(COMPOSE_BASE_PATH):
         os.chdir(COMPOSE_BASE_PATH)
-        compose_files = glob.glob('services/**/docker-compose.yml', recursive=True)
-    else:
-        compose_files = glob.glob('services/**/docker-compose.yml', recursive=True)
+    compose_files = _find_compose_files()
     
     print(f"🔍 Checking {len(compose_files)} services for updates...")
     print(f"📁 Base path: {os.getcwd()}")
     print("=" * 60)
-    
+
+    probe_cache = _load_probe_cache()
+
+    # Phase 1: collect checkable images (no network). Files whose mtime
+    # matches the cached service listing skip the YAML parse; the parsed
+    # document is only needed again if the dump fallback fires on write
+    compose_docs = {}
+    all_work = []
     for compose_file in sorted(compose_files):
+        try:
+            file_mtime = os.stat(compose_file).st_mtime
+        except OSError:
+            file_mtime = None
+
+        file_entry = probe_cache['files'].get(compose_file)
+        if file_entry and file_mtime is not None and file_entry.get('mtime') == file_mtime:
+            for svc in file_entry.get('services', []):
+                all_work.append({
+                    'service': svc['service'],
+                    'file': compose_file,
+                    'config': None,  # doc not parsed; lazily reloaded if needed
+                    'image': svc['image'],
+                    'tag': svc['tag'],
+                    'mtime': file_mtime,
+                })
+            continue
+
+        compose_data, work_items = collect_service_images(compose_file)
+        if compose_data is not None:
+            compose_docs[compose_file] = compose_data
+        for item in work_items:
+            item['mtime'] = file_mtime
+        all_work.extend(work_items)
+
+        if file_mtime is not None:
+            probe_cache['files'][compose_file] = {
+                'mtime': file_mtime,
+                'services': [
+                    {'service': i['service'], 'image': i['image'], 'tag': i['tag']}
+                    for i in work_items
+                ],
+            }
+
+    # Split work into services with a fresh cache entry and services that
+    # actually need a registry round-trip
+    now = time.time()
+    results_by_file = {}
+    to_probe = []
+
+    for item in all_work:
+        cache_key = f"{item['file']}::{item['service']}"
+        entry = probe_cache['probes'].get(cache_key)
+        current_image = f"{item['image']}:{item['tag']}"
+
+        if (entry
+                and entry.get('mtime') == item['mtime']
+                and entry.get('image_ref') == current_image
+                and now - entry.get('checked_at', 0) < PROBE_CACHE_TTL):
+            results_by_file.setdefault(item['file'], []).append((item, entry.get('latest_tag'), None))
+        else:
+            to_probe.append(item)
+
+    skipped = len(all_work) - len(to_probe)
+    if skipped:
+        print(f"💾 Reusing {skipped} cached probe result(s) (<24h old)")
+    print(f"🌐 Probing {len(to_probe)} images with {MAX_WORKERS} workers...")
+
+    # Phase 2: probe registries in parallel (network-bound fan-out).
+    # Images like postgres or redis appear in several compose files; submit
+    # one probe per unique (image, tag) and fan the result back out so
+    # duplicates cost zero extra HTTP calls
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        future_by_image = {}
+        items_by_future = {}
+        for item in to_probe:
+            probe_key = (item['image'], item['tag'])
+            future = future_by_image.get(probe_key)
+            if future is None:
+                future = executor.submit(probe_image, item['image'], item['tag'], rate_limiter)
+                future_by_image[probe_key] = future
+                items_by_future[future] = []
+            items_by_future[future].append(item)
+
+        deduped = len(to_probe) - len(future_by_image)
+        if deduped:
+            print(f"🔁 Deduplicated {deduped} repeated image check(s)")
+
+        for future in as_completed(items_by_future):
+            items = items_by_future[future]
+            try:
+                latest_tag, changelog = future.result()
+            except Exception as e:
+                print(f"Error probing {items[0]['image']}: {e}")
+                latest_tag, changelog = None, None
+
+            for item in items:
+                results_by_file.setdefault(item['file'], []).append((item, latest_tag, changelog))
+
+                if latest_tag:
+                    probe_cache['probes'][f"{item['file']}::{item['service']}"] = {
+                        'mtime': item['mtime'],
+                        'image_ref': f"{item['image']}:{item['tag']}",
+                        'latest_tag': latest_tag,
+                        'checked_at': now,
+                    }
+
+    # Phase 2.5: batch-fetch changelogs for every pending update in a single
+    # GraphQL request instead of one REST call per repo
+    repo_for = REPO_MAPPINGS.get
+    update_specs = []
+    for file_results in results_by_file.values():
+        for item, latest_tag, _ in file_results:
+            if latest_tag and compare_versions(item['tag'], latest_tag):
+                repo_name = repo_for(item['image'])
+                if repo_name:
+                    update_specs.append((repo_name, item['tag'], latest_tag))
+
+    changelogs = get_github_releases_batch(update_specs, rate_limiter)
+
+    changelog_for = changelogs.get
+    for compose_file, file_results in results_by_file.items():
+        results_by_file[compose_file] = [
+            (item, latest_tag, changelog_for(repo_for(item['image'])) if latest_tag else None)
+            for item, latest_tag, _ in file_results
+        ]
+
+    # Phase 3: apply updates and rewrite each modified file once
+    for compose_file in sorted(results_by_file):
         category = compose_file.split('/')[1] if len(compose_file.split('/')) > 1 else 'unknown'
         service = compose_file.split('/')[2] if len(compose_file.split('/')) > 2 else 'unknown'
-        
+
         print(f"\n📁 {category}/{service}")
         print(f"   File: {compose_file}")
-        
-        updates, modified = check_service_for_updates(compose_file, rate_limiter)
+
+        updates, modified = apply_updates(compose_file, compose_docs.get(compose_file), results_by_file[compose_file])
+        if modified:
+            # The rewrite changed the file's mtime; drop the cached listing
+            # so the next run re-parses it
+            probe_cache['files'].pop(compose_file, None)
         if updates:
             all_updates.extend(updates)
             print(f"   ✅ {len(updates)} update(s) found")
         else:
             print(f"   ℹ️ No updates available")
-    
+
     print("\n" + "=" * 60)
     
     # Generate results with safe GitHub Actions handling
     if all_updates:
+        # Group by category once and share between the env summary and the
+        # console display (the category was computed at update creation)
+        by_category = defaultdict(list)
+        for update in all_updates:
+            by_category[update['category']].append(update)
+
         env_file = os.environ.get('GITHUB_ENV', '/tmp/github_env')
-        safe_write_github_env(env_file, all_updates)
-        
+        safe_write_github_env(env_file, all_updates, by_category)
+
         print(f"✅ Found {len(all_updates)} total updates!")
-        
-        # Group by category for console display
-        by_category = {}
-        for update in all_updates:
-            category = update['file'].split('/')[1]
-            if category not in by_category:
-                by_category[category] = []
-            by_category[category].append(update)
-        
+
         for category, updates in by_category.items():
             print(f"\n📁 {category.upper()}:")
             for update in updates:
@@ -635,7 +1282,9 @@ def main():
         with open(env_file, 'a') as f:
             f.write("UPDATES_FOUND=false\n")
         print("ℹ️ All services are up to date!")
-    
+
+    _save_etag_cache()
+    _save_probe_cache(probe_cache)
     print(f"\n✅ Update check completed successfully")
 
 if __name__ == "__main__":